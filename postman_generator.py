@@ -1,21 +1,106 @@
 import os
 import re
+import io
 import json
 import uuid
+import time
+import socket
 import argparse
+import threading
+import multiprocessing
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-def find_service_files(root_dir):
+class EventStream:
+    """
+    Write progress events as newline-delimited JSON.
+    - Every event has an 'event' name and a 'time' timestamp
+    - Events are dropped while no stream is open, or once the consumer goes away
+    """
+    
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.counts = {}
+        self.lock = threading.Lock()
+    
+    def emit(self, event, **fields):
+        with self.lock:
+            self.counts[event] = self.counts.get(event, 0) + 1
+            if self.stream is None:
+                return
+            
+            line = json.dumps({'event': event, 'time': time.time(), **fields})
+            try:
+                self.stream.write(line + '\n')
+                self.stream.flush()
+            except OSError:
+                self.stream = None
+    
+    def close(self):
+        with self.lock:
+            if self.stream is not None:
+                try:
+                    self.stream.close()
+                except OSError:
+                    pass
+            self.stream = None
+
+def open_event_stream(target):
+    """
+    Open an event stream target:
+    - 'fd:N' writes to an already open file descriptor
+    - 'tcp:HOST:PORT' or 'unix:PATH' connects to a listening socket
+    - anything else is a file path that events are appended to
+    """
+    if target.startswith('fd:'):
+        return os.fdopen(int(target[3:]), 'w', encoding='utf-8')
+    
+    if target.startswith('tcp:'):
+        host, port = target[4:].rsplit(':', 1)
+        return socket.create_connection((host, int(port))).makefile('w', encoding='utf-8')
+    
+    if target.startswith('unix:'):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(target[5:])
+        return sock.makefile('w', encoding='utf-8')
+    
+    return open(target, 'a', encoding='utf-8')
+
+# Progress events of the current run, see --events
+events = EventStream()
+
+def matches_project(client, projects):
+    """Check if a client folder is selected by a project name like 'order-client', 'order' or 'orders'."""
+    return any(name in (client, client[:-7], extract_project_name(client)) for name in projects)
+
+def is_excluded_client(path, projects):
+    """Check if path lies in a '-client' folder that is not selected by projects."""
+    if not projects:
+        return False
+    client_part = next((part for part in Path(path).parts if part.endswith('-client')), None)
+    return client_part is not None and not matches_project(client_part, projects)
+
+def find_service_files(root_dir, projects=None):
     """
     Find all files ending with 'Service.java' in projects ending with '-client'.
     - Ignores directories like node_modules and other common ignored folders
+    - If projects is given, only client folders matching one of them are searched
     """
     service_files = []
     ignored_dirs = {'node_modules', '.git', 'target', 'build', 'dist', 'bin', '.idea', '.vscode'}
     
-    for root, dirs, files in os.walk(root_dir):
-        # Skip ignored directories
-        dirs[:] = [d for d in dirs if d not in ignored_dirs]
+    for dirs_scanned, (root, dirs, files) in enumerate(os.walk(root_dir), 1):
+        if dirs_scanned % 100 == 0:
+            events.emit('walk_progress', kind='service', root_dir=root_dir, dirs_scanned=dirs_scanned, files_found=len(service_files), done=False)
+        
+        if is_excluded_client(root, projects):
+            dirs[:] = []
+            continue
+        
+        # Skip ignored directories and client folders that are not selected
+        dirs[:] = [d for d in dirs if d not in ignored_dirs and not is_excluded_client(os.path.join(root, d), projects)]
         
         # Check if we're in a project that ends with -client
         if any(part.endswith('-client') for part in root.split(os.sep)):
@@ -24,6 +109,7 @@ def find_service_files(root_dir):
                     print(file)
                     service_files.append(os.path.join(root, file))
     
+    events.emit('walk_progress', kind='service', root_dir=root_dir, files_found=len(service_files), done=True)
     return service_files
 
 def find_model_files(root_dir):
@@ -31,7 +117,10 @@ def find_model_files(root_dir):
     model_files = []
     ignored_dirs = {'node_modules', '.git', 'target', 'build', 'dist', 'bin', '.idea', '.vscode'}
     
-    for root, dirs, files in os.walk(root_dir):
+    for dirs_scanned, (root, dirs, files) in enumerate(os.walk(root_dir), 1):
+        if dirs_scanned % 100 == 0:
+            events.emit('walk_progress', kind='model', root_dir=root_dir, dirs_scanned=dirs_scanned, files_found=len(model_files), done=False)
+        
         # Skip ignored directories
         dirs[:] = [d for d in dirs if d not in ignored_dirs]
         
@@ -39,13 +128,85 @@ def find_model_files(root_dir):
             if file.endswith('.java') and not file.endswith('Service.java'):
                 model_files.append(os.path.join(root, file))
     
+    events.emit('walk_progress', kind='model', root_dir=root_dir, files_found=len(model_files), done=True)
     return model_files
 
-def parse_model_file(file_path):
+def read_file(file_path):
+    """Read a source file as text."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def get_file_size(file_path):
+    """Size of a file in bytes, or None if it cannot be read."""
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return None
+
+def prefetch_files(file_paths, workers=8, max_bytes=64 * 1024 * 1024, max_file_size=0):
+    """
+    Read files ahead of the parsers using a thread pool.
+    - Yields (file_path, content, size) in the order of file_paths, size in bytes on disk
+    - Files being read or waiting to be consumed never add up to more than
+      max_bytes on disk, except that one read is always in flight
+    - Files larger than max_file_size bytes are not read
+    - content is None if the file was not read or the read failed, so the
+      parser can report the error itself
+    """
+    if workers <= 1:
+        for file_path in file_paths:
+            yield file_path, None, None
+        return
+    
+    paths = iter(file_paths)
+    pending = deque()
+    reserved = 0
+    waiting = None
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def fill():
+            nonlocal reserved, waiting
+            while len(pending) < workers * 4:
+                if waiting is None:
+                    file_path = next(paths, None)
+                    if file_path is None:
+                        break
+                    waiting = (file_path, get_file_size(file_path))
+                
+                file_path, size = waiting
+                if max_file_size and size is not None and size > max_file_size:
+                    # Leave it to the parse guard to quarantine without reading it
+                    waiting = None
+                    pending.append((file_path, size, None))
+                    continue
+                
+                # Reserve the size before reading so in-flight reads count too,
+                # but always keep at least one read in flight
+                if pending and reserved + (size or 0) > max_bytes:
+                    break
+                
+                waiting = None
+                reserved += size or 0
+                pending.append((file_path, size, executor.submit(read_file, file_path)))
+        
+        fill()
+        while pending:
+            file_path, size, future = pending.popleft()
+            content = None
+            if future is not None:
+                try:
+                    content = future.result()
+                except (OSError, UnicodeDecodeError):
+                    pass
+                reserved -= size or 0
+            fill()
+            yield file_path, content, size
+
+def parse_model_file(file_path, content=None):
     """Parse a model file to extract fields."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        if content is None:
+            content = read_file(file_path)
         
         # Extract the class name
         class_name_match = re.search(r'public\s+(?:class|enum|interface)\s+(\w+)', content)
@@ -72,6 +233,7 @@ def parse_model_file(file_path):
         }
     except Exception as e:
         print(f"Error parsing model file {file_path}: {e}")
+        events.emit('error', stage='parse', file_path=file_path, message=str(e))
         return None
 
 def create_model_template(model_info):
@@ -103,11 +265,11 @@ def create_model_template(model_info):
     
     return template
 
-def parse_service_file(file_path, model_map):
+def parse_service_file(file_path, model_map, content=None):
     """Parse a Service interface file and extract API details with improved parameter parsing."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        if content is None:
+            content = read_file(file_path)
 
         # Extract the interface name
         interface_name_match = re.search(r'public\s+interface\s+(\w+)', content)
@@ -201,14 +363,167 @@ def parse_service_file(file_path, model_map):
 
     except Exception as e:
         print(f"Error parsing service file {file_path}: {e}")
+        events.emit('error', stage='parse', file_path=file_path, message=str(e))
         import traceback
         traceback.print_exc()
-        return {
-            'interface_name': os.path.basename(file_path).replace('.java', ''),
-            'base_path': "",
-            'methods': [],
-            'file_path': file_path
-        }
+        return empty_service_info(file_path)
+
+def empty_service_info(file_path):
+    """Service information used when a service file could not be parsed."""
+    return {
+        'interface_name': os.path.basename(file_path).replace('.java', ''),
+        'base_path': "",
+        'methods': [],
+        'file_path': file_path
+    }
+
+def parse_worker_loop(conn, model_map):
+    """
+    Worker process loop: parse the files sent over conn until None is received.
+    Sends 'ready' once started, then (result, events) for each file where events
+    are the events raised while parsing, so that only the main process writes
+    to the event stream.
+    """
+    conn.send('ready')
+    
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        
+        kind, file_path, content = job
+        events.stream = io.StringIO()
+        if kind == 'model':
+            result = parse_model_file(file_path, content)
+        else:
+            result = parse_service_file(file_path, model_map, content)
+        
+        captured = [json.loads(line) for line in events.stream.getvalue().splitlines()]
+        conn.send((result, captured))
+
+class ParseGuard:
+    """
+    Enforce per-file size and parse-time budgets.
+    - Files larger than max_file_size bytes are skipped
+    - With a parse_timeout, files are parsed in a worker process that is killed
+      and replaced when a file takes longer than parse_timeout seconds
+    - Offending files are recorded in quarantined and the run continues
+    """
+    
+    def __init__(self, max_file_size=0, parse_timeout=0):
+        self.max_file_size = max_file_size
+        self.parse_timeout = parse_timeout
+        self.model_map = {}
+        self.quarantined = []
+        self.process = None
+        self.conn = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.stop_worker()
+    
+    def set_model_map(self, model_map):
+        """Use model_map for service files; the worker is restarted to pick it up."""
+        self.model_map = model_map
+        self.stop_worker()
+    
+    def start_worker(self):
+        # Forking while the read-ahead threads run may deadlock the child, so
+        # workers come from a fork server or a fresh interpreter instead
+        start_methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in start_methods else 'spawn')
+        
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(target=parse_worker_loop, args=(child_conn, self.model_map), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        
+        # Wait for the worker without a time limit, so startup does not count
+        # against the parse budget of the first file
+        self.conn.recv()
+    
+    def stop_worker(self, kill=False):
+        if self.process is None:
+            return
+        if kill:
+            self.process.terminate()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                self.process.terminate()
+        self.conn.close()
+        self.process.join()
+        self.process = None
+        self.conn = None
+    
+    def quarantine(self, kind, file_path, reason, detail):
+        print(f"Quarantined {kind} file {file_path}: {detail}")
+        events.emit('error', stage='quarantine', file_path=file_path, reason=reason, message=detail)
+        self.quarantined.append({
+            'file_path': file_path,
+            'kind': kind,
+            'reason': reason,
+            'detail': detail
+        })
+    
+    def parse(self, kind, file_path, content=None, size=None):
+        """
+        Parse a 'model' or 'service' file, returning the fallback result if it is quarantined.
+        size is the file size in bytes on disk, if already known.
+        """
+        start = time.perf_counter()
+        result = self.parse_within_budget(kind, file_path, content, size)
+        
+        fields = {'kind': kind, 'file_path': file_path, 'duration_ms': round((time.perf_counter() - start) * 1000, 3)}
+        if kind == 'service':
+            fields['methods'] = len(result['methods'])
+        events.emit('file_parsed', **fields)
+        
+        return result
+    
+    def parse_within_budget(self, kind, file_path, content, size):
+        # Quarantined services are marked so emitters keep their previous output
+        fallback = None if kind == 'model' else {**empty_service_info(file_path), 'quarantined': True}
+        
+        if self.max_file_size:
+            if size is None:
+                size = get_file_size(file_path)
+            # An unreadable file is left to the parser to report
+            if size is not None and size > self.max_file_size:
+                self.quarantine(kind, file_path, 'size', f"{size} bytes exceeds the {self.max_file_size} byte budget")
+                return fallback
+        
+        if not self.parse_timeout:
+            if kind == 'model':
+                return parse_model_file(file_path, content)
+            return parse_service_file(file_path, self.model_map, content)
+        
+        try:
+            if self.process is None:
+                self.start_worker()
+            
+            self.conn.send((kind, file_path, content))
+            if self.conn.poll(self.parse_timeout):
+                result, captured = self.conn.recv()
+                for event in captured:
+                    del event['time']
+                    events.emit(event.pop('event'), **event)
+                return result
+        except (EOFError, OSError) as e:
+            self.stop_worker(kill=True)
+            self.quarantine(kind, file_path, 'crash', f"worker process failed: {e}")
+            return fallback
+        
+        self.stop_worker(kill=True)
+        self.quarantine(kind, file_path, 'timeout', f"parsing took longer than {self.parse_timeout}s")
+        return fallback
 
 
 def extract_project_name(project):
@@ -233,10 +548,66 @@ def normalize_path(path_segments):
     result = [segment for segment in path_segments if segment]
     return result
 
-def create_postman_collection(service_info, project_name, model_map):
-    """Create a Postman collection from the service information."""
+def build_path_segments(service_info, method, project_name):
+    """Build the URL path segments of a method, keeping path params as {name}."""
+    url_path = [project_name, 'api']
+    
+    # Add the base path if not empty and handle trailing slashes
+    if service_info['base_path']:
+        base_path_segments = service_info['base_path'].strip('/').split('/')
+        url_path.extend([s for s in base_path_segments if s])
+        
+    # Add method path, handle trailing/leading slashes
+    if method['path']:
+        path_segments = method['path'].strip('/').split('/')
+        url_path.extend([s for s in path_segments if s])  # Remove empty segments
+    
+    # Normalize the path to avoid double slashes
+    return normalize_path(url_path)
+
+def get_request_name(method):
+    """Turn a camelCase method name into a readable request name."""
+    request_name = ' '.join(re.findall('[A-Z][a-z]*', method['name']))
+    return request_name or method['name']
+
+def get_collection_name(interface_name):
+    """Strip the leading 'I' of an interface name to get the collection name."""
+    return interface_name.replace('I', '', 1) if interface_name.startswith('I') else interface_name
+
+def add_compact_defaults(collection):
+    """
+    Send the Accept header from a collection-level pre-request script.
+    Compact requests rely on it and on the collection-level auth.
+    """
+    collection['event'] = [
+        {
+            'listen': 'prerequest',
+            'script': {
+                'type': 'text/javascript',
+                'exec': ["pm.request.headers.upsert({ key: 'Accept', value: 'application/json' });"]
+            }
+        }
+    ]
+
+def to_json(data, minify=False):
+    """Serialize data as JSON, indented or minified."""
+    if minify:
+        return json.dumps(data, separators=(',', ':'))
+    return json.dumps(data, indent=2)
+
+def dump_json(data, f, minify=False):
+    """Write data as JSON, indented or minified."""
+    f.write(to_json(data, minify))
+
+def create_postman_collection(service_info, project_name, model_map, compact=False, minify=False):
+    """
+    Create a Postman collection from the service information.
+    - In compact mode requests inherit auth and the Accept header from the
+      collection, and empty fields are left out
+    - With minify, request body templates are minified too
+    """
     interface_name = service_info['interface_name']
-    collection_name = interface_name.replace('I', '', 1) if interface_name.startswith('I') else interface_name
+    collection_name = get_collection_name(interface_name)
     
     collection = {
         'info': {
@@ -266,32 +637,13 @@ def create_postman_collection(service_info, project_name, model_map):
     }
     
     for method in service_info['methods']:
-        request_name = ' '.join(re.findall('[A-Z][a-z]*', method['name']))
-        if not request_name:
-            request_name = method['name']
-            
-        # Build URL
-        url_path = [project_name, 'api']
-        
-        # Add the base path if not empty and handle trailing slashes
-        if service_info['base_path']:
-            base_path_segments = service_info['base_path'].strip('/').split('/')
-            url_path.extend([s for s in base_path_segments if s])
+        request_name = get_request_name(method)
             
-        # Add method path, handle trailing/leading slashes
-        if method['path']:
-            path_segments = method['path'].strip('/').split('/')
-            path_segments = [s for s in path_segments if s]  # Remove empty segments
-            
-            # Replace path params with variables
-            for i, segment in enumerate(path_segments):
-                if '{' in segment:
-                    path_segments[i] = segment.replace('{', '{{').replace('}', '}}')
-                    
-            url_path.extend(path_segments)
-        
-        # Normalize the path to avoid double slashes
-        url_path = normalize_path(url_path)
+        # Build URL, replacing path params with variables
+        url_path = [
+            segment.replace('{', '{{').replace('}', '}}') if '{' in segment else segment
+            for segment in build_path_segments(service_info, method, project_name)
+        ]
         
         # Create request item
         request_item = {
@@ -325,7 +677,6 @@ def create_postman_collection(service_info, project_name, model_map):
             'response': []
         }
 
-        # Add query parameters if any
         # Add query parameters if any
         if method['query_params']:
             query_params = []
@@ -357,7 +708,7 @@ def create_postman_collection(service_info, project_name, model_map):
             
             request_item['request']['body'] = {
                 'mode': 'raw',
-                'raw': json.dumps(body_template, indent=2),
+                'raw': to_json(body_template, minify),
                 'options': {
                     'raw': {
                         'language': 'json'
@@ -365,52 +716,162 @@ def create_postman_collection(service_info, project_name, model_map):
                 }
             }
         
+        if compact:
+            # Rely on the collection-level auth and Accept header instead
+            request = request_item['request']
+            del request['auth']
+            request['header'] = [header for header in request['header'] if header['key'] != 'Accept']
+            for key in ('header', 'description'):
+                if not request[key]:
+                    del request[key]
+            del request_item['response']
+        
         collection['item'].append(request_item)
     
+    if compact:
+        add_compact_defaults(collection)
+    
     return collection
 
-def main():
-    parser = argparse.ArgumentParser(description='Generate Postman collections from Java service interfaces')
-    parser.add_argument('root_dirs', nargs='+', help='Root directories to search for service files')
-    parser.add_argument('--output', help='Output directory for Postman collections', default='postman_collections')
-    args = parser.parse_args()
+def report_written(output_path, output_format):
+    """Emit a collection_written event for a generated file."""
+    events.emit('collection_written', format=output_format, path=output_path, bytes=os.path.getsize(output_path))
+
+def load_manifest(output_dir):
+    """Load the manifest.json of a previous run, or None if there is none."""
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
     
-    if not os.path.exists(args.output):
-        os.makedirs(args.output)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading manifest {manifest_path}: {e}")
+        return None
+
+def create_shard(main_collection, folders, index, count):
+    """Create shard index of count of the main collection, holding folders."""
+    # Derive shard ids from the main collection id so re-imports replace them
+    return {
+        **main_collection,
+        'info': {
+            **main_collection['info'],
+            'name': f"{main_collection['info']['name']} ({index}/{count})",
+            '_postman_id': str(uuid.uuid5(uuid.UUID(main_collection['info']['_postman_id']), f'shard-{index}'))
+        },
+        'item': folders
+    }
+
+def split_into_shards(main_collection, max_bytes, minify=False):
+    """
+    Split the project folders of the main collection into groups that each
+    serialize to at most max_bytes. A project larger than max_bytes gets a group of its own.
+    """
+    folders = main_collection['item']
     
-    # Initialize the model map
-    model_map = {}
-    service_files = []
+    # Measure the envelope with the longest possible shard name
+    envelope_size = len(to_json(create_shard(main_collection, [], len(folders), len(folders)), minify))
+    empty_item_size = len(to_json({'item': []}, minify))
+    
+    shards = []
+    current = []
+    current_size = envelope_size
+    for folder in folders:
+        # Measure each folder at the depth it has in a shard, which also
+        # covers the separators around it, so the total is an upper bound
+        folder_size = len(to_json({'item': [folder]}, minify)) - empty_item_size
+        if current and current_size + folder_size > max_bytes:
+            shards.append(current)
+            current = []
+            current_size = envelope_size
+        current.append(folder)
+        current_size += folder_size
     
-    # Process each root directory
-    for root_dir in args.root_dirs:
-        # Find and parse all model files to build a mapping
-        model_files = find_model_files(root_dir)
-        print(f"Found {len(model_files)} model files in {root_dir}")
+    if current:
+        shards.append(current)
+    
+    return shards
+
+def write_main_collection(main_collection, output_dir, options):
+    """Write All_Services.json, or size-bounded All_Services_N.json shards if it is too large."""
+    max_bytes = options.get('max_collection_bytes')
+    shards = split_into_shards(main_collection, max_bytes, options.get('minify')) if max_bytes else []
+    
+    if len(shards) <= 1:
+        remove_stale_shards(output_dir, 0)
         
-        for model_file in model_files:
-            model_info = parse_model_file(model_file)
-            if model_info:
-                model_map[model_info['name']] = model_info
+        output_path = os.path.join(output_dir, "All_Services.json")
+        with open(output_path, 'w', encoding='utf-8') as f:
+            dump_json(main_collection, f, options.get('minify'))
         
-        # Find service files
-        root_service_files = find_service_files(root_dir)
-        print(f"Found {len(root_service_files)} service files in {root_dir}")
-        service_files.extend(root_service_files)
+        print(f"Created main collection: {output_path}")
+        report_written(output_path, 'postman')
+        return
     
-    print(f"Parsed {len(model_map)} models successfully across all directories")
-    print(f"Found {len(service_files)} service files across all directories")
+    remove_stale_shards(output_dir, len(shards))
     
-    # Group by project (client) name
-    projects = {}
-    for file_path in service_files:
-        path_parts = Path(file_path).parts
-        client_part = next((part for part in path_parts if part.endswith('-client')), None)
+    for i, folders in enumerate(shards, 1):
+        text = to_json(create_shard(main_collection, folders, i, len(shards)), options.get('minify'))
+        output_path = os.path.join(output_dir, f"All_Services_{i}.json")
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(text)
         
-        if client_part:
-            if client_part not in projects:
-                projects[client_part] = []
-            projects[client_part].append(file_path)
+        print(f"Created main collection shard: {output_path}")
+        report_written(output_path, 'postman')
+        
+        # Only a shard holding a single oversized project may exceed the limit
+        if len(text.encode('utf-8')) > max_bytes and len(folders) > 1:
+            print(f"Error: {output_path} exceeds the {max_bytes} byte limit")
+            events.emit('error', stage='emit', path=output_path, message=f"shard exceeds the {max_bytes} byte limit")
+
+def remove_stale_shards(output_dir, shard_count):
+    """
+    Remove main collection files left over from a run with a different layout:
+    All_Services.json when sharding, and All_Services_N.json above shard_count.
+    """
+    stale = []
+    if shard_count and os.path.exists(os.path.join(output_dir, "All_Services.json")):
+        stale.append("All_Services.json")
+    
+    for name in os.listdir(output_dir):
+        shard_match = re.fullmatch(r'All_Services_(\d+)\.json', name)
+        if shard_match and int(shard_match.group(1)) > shard_count:
+            stale.append(name)
+    
+    for name in stale:
+        os.remove(os.path.join(output_dir, name))
+        print(f"Removed stale collection: {os.path.join(output_dir, name)}")
+
+def remove_stale_outputs(previous, manifest, output_dir):
+    """Remove the output files recorded in the previous manifest that the new one no longer lists."""
+    current_files = {name for entry in manifest['projects'] for name in entry.get('files', [])}
+    for entry in previous.get('projects', []):
+        for name in entry.get('files', []):
+            output_path = os.path.join(output_dir, name)
+            if name not in current_files and os.path.exists(output_path):
+                os.remove(output_path)
+                print(f"Removed stale collection: {output_path}")
+
+def write_postman_collections(parsed, output_dir, options):
+    """
+    Postman emitter: write service, project and main collections.
+    - manifest.json records the folder and output files of each project in All_Services.json
+    - When only some projects were parsed, their folders are replaced in the
+      manifest and All_Services.json is rebuilt from it
+    - Output files of services and projects that are gone are removed
+    - Quarantined services keep their folder item and collection from the previous run
+    """
+    model_map = parsed['model_map']
+    compact = options.get('compact', False)
+    # Options that change the content of the folders stored in the manifest
+    manifest_options = {'compact': compact, 'minify': bool(options.get('minify'))}
+    manifest_entries = []
+    
+    previous = load_manifest(output_dir)
+    previous_entries = {}
+    if previous is not None and previous.get('options') == manifest_options:
+        previous_entries = {entry['client']: entry for entry in previous.get('projects', [])}
     
     # Create a main collection that will contain all projects
     main_collection = {
@@ -445,21 +906,33 @@ def main():
         ]
     }
     
-    for project, files in projects.items():
-        project_name = extract_project_name(project)
-        project_collections = []
+    for project in parsed['projects']:
+        project_name = project['name']
         
         project_folder = {
             'name': project_name,
             'item': [],
-            'description': f'Services from {project}'
+            'description': f"Services from {project['client']}"
         }
         
-        for file_path in files:
+        output_files = []
+        sources = {}
+        previous_entry = previous_entries.get(project['client'], {})
+        for service_info in project['services']:
+            if service_info.get('quarantined'):
+                # Keep what the previous run generated for this service, if anything
+                filename = previous_entry.get('sources', {}).get(service_info['file_path'])
+                previous_item = next((item for item in previous_entry.get('folder', {}).get('item', [])
+                                      if filename and item['name'] == filename[:-5]), None)
+                if previous_item is not None:
+                    project_folder['item'].append(previous_item)
+                    output_files.append(filename)
+                    sources[service_info['file_path']] = filename
+                    print(f"Kept previous collection: {os.path.join(output_dir, filename)}")
+                continue
+            
             try:
-                service_info = parse_service_file(file_path, model_map)
-                collection = create_postman_collection(service_info, project_name, model_map)
-                project_collections.append(collection)
+                collection = create_postman_collection(service_info, project_name, model_map, compact, options.get('minify'))
                 
                 # Add to project folder
                 service_name = collection['info']['name']
@@ -469,26 +942,27 @@ def main():
                 })
                 
                 # Save individual collection
-                filename = f"{service_info['interface_name'].replace('I', '', 1) if service_info['interface_name'].startswith('I') else service_info['interface_name']}.json"
-                output_path = os.path.join(args.output, filename)
+                filename = f"{get_collection_name(service_info['interface_name'])}.json"
+                output_path = os.path.join(output_dir, filename)
                 
                 with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(collection, f, indent=2)
+                    dump_json(collection, f, options.get('minify'))
+                output_files.append(filename)
+                sources[service_info['file_path']] = filename
                 
                 print(f"Created collection: {output_path}")
+                report_written(output_path, 'postman')
             except Exception as e:
-                print(f"Error processing {file_path}: {e}")
-        
-        # Add project folder to main collection
-        main_collection['item'].append(project_folder)
+                print(f"Error processing {service_info['file_path']}: {e}")
+                events.emit('error', stage='emit', file_path=service_info['file_path'], message=str(e))
         
         # Create a project-level collection
-        if project_collections:
+        if project_folder['item']:
             project_collection = {
                 'info': {
                     'name': project_name,
                     '_postman_id': str(uuid.uuid4()),
-                    'description': f'Collection for {project}',
+                    'description': f"Collection for {project['client']}",
                     'schema': 'https://schema.getpostman.com/json/collection/v2.1.0/collection.json'
                 },
                 'item': project_folder['item'],
@@ -515,17 +989,495 @@ def main():
                     }
                 ]
             }
+            if compact:
+                add_compact_defaults(project_collection)
+            
+            with open(os.path.join(output_dir, f"{project_name}.json"), 'w', encoding='utf-8') as f:
+                dump_json(project_collection, f, options.get('minify'))
             
-            with open(os.path.join(args.output, f"{project_name}.json"), 'w', encoding='utf-8') as f:
-                json.dump(project_collection, f, indent=2)
+            output_files.append(f"{project_name}.json")
             
-            print(f"Created project collection: {os.path.join(args.output, f'{project_name}.json')}")
+            print(f"Created project collection: {os.path.join(output_dir, f'{project_name}.json')}")
+            report_written(os.path.join(output_dir, f"{project_name}.json"), 'postman')
+        
+        # Record project folder for the main collection
+        manifest_entries.append({
+            'client': project['client'],
+            'name': project_name,
+            'folder': project_folder,
+            'files': output_files,
+            'sources': sources
+        })
+    
+    if parsed['selected_projects']:
+        # Patch only the selected projects into the previous run
+        if previous is None:
+            print("No manifest.json found, run once without --project to create All_Services.json")
+            return
+        if previous.get('options') != manifest_options:
+            print(f"manifest.json was generated with options {previous.get('options')}, not {manifest_options}; "
+                  "run without --project to regenerate All_Services.json")
+            return
+        
+        # Selected projects that produced no services are dropped, their files removed below
+        entries = {entry['client']: entry for entry in manifest_entries}
+        manifest = {
+            **previous,
+            'projects': [entry for entry in previous['projects']
+                         if entry['client'] in entries or not matches_project(entry['client'], parsed['selected_projects'])]
+        }
+        for i, entry in enumerate(manifest['projects']):
+            if entry['client'] in entries:
+                manifest['projects'][i] = entries.pop(entry['client'])
+        manifest['projects'].extend(entries.values())
+    else:
+        manifest = {
+            'main_postman_id': main_collection['info']['_postman_id'],
+            'options': manifest_options,
+            'projects': manifest_entries
+        }
+    
+    if previous is not None:
+        remove_stale_outputs(previous, manifest, output_dir)
+    
+    # Let the next run skip unchanged models and unselected folders
+    manifest['models'] = parsed['model_cache']
+    manifest['client_dirs'] = parsed['client_dirs']
+    
+    main_collection['info']['_postman_id'] = manifest['main_postman_id']
+    main_collection['item'] = [entry['folder'] for entry in manifest['projects']]
+    
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        dump_json(manifest, f, options.get('minify'))
+    
+    if compact:
+        add_compact_defaults(main_collection)
     
     # Save the main collection
-    with open(os.path.join(args.output, "All_Services.json"), 'w', encoding='utf-8') as f:
-        json.dump(main_collection, f, indent=2)
+    write_main_collection(main_collection, output_dir, options)
+
+def create_model_schema(model_info):
+    """Create an OpenAPI schema object for a model."""
+    properties = {}
+    for field in (model_info or {}).get('fields', []):
+        field_type = field['type']
+        
+        # Mirror the type mapping used by create_model_template
+        if field_type in ['int', 'Integer', 'long', 'Long', 'short', 'Short', 'byte', 'Byte']:
+            properties[field['name']] = {'type': 'integer'}
+        elif field_type in ['float', 'Float', 'double', 'Double']:
+            properties[field['name']] = {'type': 'number'}
+        elif field_type in ['boolean', 'Boolean']:
+            properties[field['name']] = {'type': 'boolean'}
+        elif field_type in ['String']:
+            properties[field['name']] = {'type': 'string'}
+        elif field_type.endswith('[]') or 'List' in field_type or 'Set' in field_type:
+            properties[field['name']] = {'type': 'array', 'items': {}}
+        else:
+            properties[field['name']] = {'type': 'object'}
+    
+    return {'type': 'object', 'properties': properties}
+
+def create_openapi_spec(project, model_map):
+    """Create an OpenAPI 3.0 document for all services of a project."""
+    spec = {
+        'openapi': '3.0.3',
+        'info': {
+            'title': project['name'],
+            'description': f"API for {project['client']}",
+            'version': '1.0.0'
+        },
+        'servers': [{'url': 'https://base-url'}],
+        'security': [{'bearerAuth': []}],
+        'tags': [],
+        'paths': {},
+        'components': {
+            'securitySchemes': {
+                'bearerAuth': {'type': 'http', 'scheme': 'bearer'}
+            },
+            'schemas': {}
+        }
+    }
+    
+    operation_ids = set()
+    for service_info in project['services']:
+        tag = get_collection_name(service_info['interface_name'])
+        spec['tags'].append({'name': tag, 'description': f"Collection for {service_info['interface_name']}"})
+        
+        for method in service_info['methods']:
+            path = '/' + '/'.join(build_path_segments(service_info, method, project['name']))
+            
+            # Path parameters must match the placeholders of the path exactly
+            parameters = []
+            for param in dict.fromkeys(re.findall(r'\{([^{}]+)\}', path)):
+                parameters.append({'name': param, 'in': 'path', 'required': True, 'schema': {'type': 'string'}})
+            for param in method['query_params']:
+                parameters.append({'name': param, 'in': 'query', 'schema': {'type': 'string'}})
+            
+            # Overloaded Java methods need distinct operation ids
+            operation_id = f"{tag}_{method['name']}"
+            suffix = 2
+            while operation_id in operation_ids:
+                operation_id = f"{tag}_{method['name']}_{suffix}"
+                suffix += 1
+            operation_ids.add(operation_id)
+            
+            operation = {
+                'tags': [tag],
+                'operationId': operation_id,
+                'summary': get_request_name(method),
+                'description': method['description'],
+                'parameters': parameters,
+                'responses': {
+                    '200': {'description': method['return_type']}
+                }
+            }
+            
+            if method['http_method'] in ['POST', 'PUT']:
+                schema = {'type': 'object'}
+                if method['body_model'] and method['body_model'] in model_map:
+                    spec['components']['schemas'][method['body_model']] = create_model_schema(model_map[method['body_model']])
+                    schema = {'$ref': f"#/components/schemas/{method['body_model']}"}
+                operation['requestBody'] = {
+                    'content': {
+                        'application/json': {'schema': schema}
+                    }
+                }
+            
+            spec['paths'].setdefault(path, {})[method['http_method'].lower()] = operation
+    
+    return spec
+
+def has_quarantined_services(project, output_path):
+    """Check if a project has quarantined services, in which case its previous output_path is kept."""
+    if any(service_info.get('quarantined') for service_info in project['services']):
+        print(f"Kept previous output {output_path}: project has quarantined services")
+        return True
+    return False
+
+def write_openapi_specs(parsed, output_dir, options):
+    """OpenAPI emitter: write one specification per project."""
+    spec_dir = os.path.join(output_dir, 'openapi')
+    os.makedirs(spec_dir, exist_ok=True)
+    
+    for project in parsed['projects']:
+        if not project['services']:
+            continue
+        
+        output_path = os.path.join(spec_dir, f"{project['name']}.json")
+        if has_quarantined_services(project, output_path):
+            continue
+        
+        try:
+            spec = create_openapi_spec(project, parsed['model_map'])
+            with open(output_path, 'w', encoding='utf-8') as f:
+                dump_json(spec, f, options.get('minify'))
+            print(f"Created OpenAPI spec: {output_path}")
+            report_written(output_path, 'openapi')
+        except Exception as e:
+            print(f"Error writing OpenAPI spec {output_path}: {e}")
+            events.emit('error', stage='emit', path=output_path, message=str(e))
+
+def create_http_file(project, model_map):
+    """Create the content of a .http request file for all services of a project."""
+    lines = [
+        '@baseUrl = https://base-url',
+        '@intranetAccessToken = ',
+        ''
+    ]
+    
+    for service_info in project['services']:
+        collection_name = get_collection_name(service_info['interface_name'])
+        
+        for method in service_info['methods']:
+            url_path = [
+                segment.replace('{', '{{').replace('}', '}}') if '{' in segment else segment
+                for segment in build_path_segments(service_info, method, project['name'])
+            ]
+            url = f"{{{{baseUrl}}}}/{'/'.join(url_path)}"
+            if method['query_params']:
+                url += '?' + '&'.join([f"{param}=" for param in method['query_params']])
+            
+            lines.append(f"### {collection_name} - {get_request_name(method)}")
+            if method['description']:
+                lines.append(f"# {method['description']}")
+            lines.append(f"{method['http_method']} {url}")
+            lines.append('Authorization: Bearer {{intranetAccessToken}}')
+            lines.append('Accept: application/json')
+            
+            if method['http_method'] in ['POST', 'PUT']:
+                body_template = {}
+                if method['body_model'] and method['body_model'] in model_map:
+                    body_template = create_model_template(model_map[method['body_model']])
+                lines.append('Content-Type: application/json')
+                lines.append('')
+                lines.append(json.dumps(body_template, indent=2))
+            
+            lines.append('')
+    
+    return '\n'.join(lines)
+
+def write_http_files(parsed, output_dir, options):
+    """HTTP emitter: write one .http request file per project."""
+    http_dir = os.path.join(output_dir, 'http')
+    os.makedirs(http_dir, exist_ok=True)
+    
+    for project in parsed['projects']:
+        if not project['services']:
+            continue
+        
+        output_path = os.path.join(http_dir, f"{project['name']}.http")
+        if has_quarantined_services(project, output_path):
+            continue
+        
+        try:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(create_http_file(project, parsed['model_map']))
+            print(f"Created HTTP file: {output_path}")
+            report_written(output_path, 'http')
+        except Exception as e:
+            print(f"Error writing HTTP file {output_path}: {e}")
+            events.emit('error', stage='emit', path=output_path, message=str(e))
+
+# Emitters take the parsed representation, an output directory and output options
+EMITTERS = {
+    'postman': write_postman_collections,
+    'openapi': write_openapi_specs,
+    'http': write_http_files
+}
+
+def parse_formats(value):
+    """Parse a comma-separated list of output formats."""
+    formats = []
+    for name in value.split(','):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in EMITTERS:
+            raise argparse.ArgumentTypeError(f"unknown format '{name}' (choose from {', '.join(EMITTERS)})")
+        if name not in formats:
+            formats.append(name)
+    
+    if not formats:
+        raise argparse.ArgumentTypeError('at least one format is required')
+    
+    return formats
+
+def get_file_stamp(file_path):
+    """Modification time and size of a file, or None if it cannot be read."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def parse_sources(root_dirs, io_workers=8, prefetch_bytes=64 * 1024 * 1024, guard=None, projects=None, cache=None):
+    """
+    Walk and parse all model and service files once.
+    - If projects is given, only the services of matching client folders are parsed
+    - cache holds the 'models' and 'client_dirs' recorded in the manifest of a
+      previous run. Unchanged model files are not parsed again, and if every
+      selected project was seen before, only its client folders are walked
+    Returns the representation shared by every emitter.
+    """
+    if guard is None:
+        guard = ParseGuard()
+    
+    cache = cache or {}
+    cached_models = cache.get('models', {})
+    cached_client_dirs = cache.get('client_dirs', {})
+    
+    selected_dirs = None
+    if projects and cached_models and all(any(matches_project(client, [name]) for client in cached_client_dirs) for name in projects):
+        selected_dirs = [client_dir for client, dirs in cached_client_dirs.items() if matches_project(client, projects) for client_dir in dirs]
+    
+    model_files = []
+    service_files = []
+    if selected_dirs is None:
+        # Process each root directory
+        for root_dir in root_dirs:
+            # Models are always found in every project, so bodies match a full run
+            root_model_files = find_model_files(root_dir)
+            print(f"Found {len(root_model_files)} model files in {root_dir}")
+            model_files.extend(root_model_files)
+            
+            # Find service files
+            root_service_files = find_service_files(root_dir, projects)
+            print(f"Found {len(root_service_files)} service files in {root_dir}")
+            service_files.extend(root_service_files)
+    else:
+        # Reuse the models of the previous run and only walk the selected client folders
+        new_model_files = [file_path for client_dir in selected_dirs for file_path in find_model_files(client_dir)
+                           if file_path not in cached_models]
+        model_files = list(cached_models) + new_model_files
+        print(f"Reusing {len(cached_models)} model files of the previous run, found {len(new_model_files)} new ones")
+        
+        for client_dir in selected_dirs:
+            client_service_files = find_service_files(client_dir, projects)
+            print(f"Found {len(client_service_files)} service files in {client_dir}")
+            service_files.extend(client_service_files)
+    
+    # Only parse model files that changed since the previous run, keeping discovery order
+    model_cache = {}
+    stamps = {}
+    reused = 0
+    for model_file in model_files:
+        stamps[model_file] = get_file_stamp(model_file)
+        cached = cached_models.get(model_file)
+        if cached is not None and cached['stamp'] == stamps[model_file]:
+            model_cache[model_file] = cached
+            reused += 1
+        elif stamps[model_file] is not None or model_file not in cached_models:
+            model_cache[model_file] = None
+    
+    # Close the read-ahead pool even if parsing fails
+    to_parse = [model_file for model_file, entry in model_cache.items() if entry is None]
+    with closing(prefetch_files(to_parse, io_workers, prefetch_bytes, guard.max_file_size)) as prefetched:
+        for model_file, content, size in prefetched:
+            model_info = guard.parse('model', model_file, content, size)
+            if model_info:
+                model_cache[model_file] = {'stamp': stamps[model_file], 'model': model_info}
+    
+    model_cache = {model_file: entry for model_file, entry in model_cache.items() if entry is not None}
+    
+    # Initialize the model map
+    model_map = {}
+    for entry in model_cache.values():
+        model_map[entry['model']['name']] = entry['model']
+    
+    print(f"Reused {reused} unchanged model files and parsed {len(to_parse)}")
+    print(f"Parsed {len(model_map)} models successfully across all directories")
+    print(f"Found {len(service_files)} service files across all directories")
+    
+    # Group by project (client) name, remembering where each client folder is
+    grouped = {}
+    client_dirs = {}
+    if projects:
+        client_dirs = {client: dirs for client, dirs in cached_client_dirs.items() if not matches_project(client, projects)}
+    for file_path in service_files:
+        path_parts = Path(file_path).parts
+        client_index = next((i for i, part in enumerate(path_parts) if part.endswith('-client')), None)
+        
+        if client_index is not None:
+            client_part = path_parts[client_index]
+            if client_part not in grouped:
+                grouped[client_part] = []
+                client_dirs[client_part] = []
+            grouped[client_part].append(file_path)
+            
+            client_dir = str(Path(*path_parts[:client_index + 1]))
+            if client_dir not in client_dirs[client_part]:
+                client_dirs[client_part].append(client_dir)
+    
+    guard.set_model_map(model_map)
+    
+    # Read service files ahead in project order while they are parsed
+    services = {client: [] for client in grouped}
+    ordered_files = [(client, file_path) for client, files in grouped.items() for file_path in files]
+    with closing(prefetch_files([file_path for _, file_path in ordered_files], io_workers, prefetch_bytes, guard.max_file_size)) as prefetched:
+        for (client, _), (file_path, content, size) in zip(ordered_files, prefetched):
+            services[client].append(guard.parse('service', file_path, content, size))
+    
+    parsed_projects = []
+    for client in grouped:
+        parsed_projects.append({
+            'client': client,
+            'name': extract_project_name(client),
+            'services': services[client]
+        })
+    
+    return {
+        'model_map': model_map,
+        'projects': parsed_projects,
+        'selected_projects': projects,
+        'quarantined': guard.quarantined,
+        'model_cache': model_cache,
+        'client_dirs': client_dirs
+    }
+
+def write_quarantine_report(quarantined, output_dir):
+    """
+    Write the files skipped by the parse budgets to quarantine.json.
+    The report is written on every run, as an empty list if nothing was skipped.
+    """
+    report_path = os.path.join(output_dir, 'quarantine.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(quarantined, f, indent=2)
+    
+    if quarantined:
+        print(f"Quarantined {len(quarantined)} file(s), see {report_path}")
+
+def run_emitters(parsed, output_dir, formats, options=None):
+    """Run the requested emitters concurrently over the same parsed sources."""
+    options = options or {}
+    with ThreadPoolExecutor(max_workers=len(formats)) as executor:
+        futures = {executor.submit(EMITTERS[name], parsed, output_dir, options): name for name in formats}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error writing {futures[future]} output: {e}")
+                events.emit('error', stage='emit', format=futures[future], message=str(e))
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate Postman collections from Java service interfaces')
+    parser.add_argument('root_dirs', nargs='+', help='Root directories to search for service files')
+    parser.add_argument('--output', help='Output directory for Postman collections', default='postman_collections')
+    parser.add_argument('--format', dest='formats', type=parse_formats, default=['postman'],
+                        help=f"Comma-separated output formats: {', '.join(EMITTERS)} (default: postman)")
+    parser.add_argument('--io-workers', type=int, default=8,
+                        help='Number of threads reading source files ahead of the parsers (default: 8, 1 disables read-ahead)')
+    parser.add_argument('--prefetch-mb', type=int, default=64,
+                        help='Maximum megabytes of source files, by size on disk, read ahead of the parsers (default: 64)')
+    parser.add_argument('--max-file-kb', type=int, default=0,
+                        help='Skip source files larger than this many kilobytes (default: 0, no limit)')
+    parser.add_argument('--parse-timeout', type=float, default=0,
+                        help='Parse files in a worker process and skip any taking longer than this many seconds (default: 0, no limit)')
+    parser.add_argument('--project', dest='projects', action='append',
+                        help='Only regenerate this project (client folder name, with or without -client); can be repeated')
+    parser.add_argument('--events', metavar='TARGET',
+                        help='Write progress events as JSON lines to fd:N, tcp:HOST:PORT, unix:PATH or a file path')
+    parser.add_argument('--compact', action='store_true',
+                        help='Leave per-request auth and Accept headers out and inherit them from the collection')
+    parser.add_argument('--minify', action='store_true', help='Write JSON output without indentation')
+    parser.add_argument('--max-collection-mb', type=float, default=0,
+                        help='Split All_Services.json by project into shards of at most this many megabytes (default: 0, no limit)')
+    args = parser.parse_args()
+    
+    if args.events:
+        events.stream = open_event_stream(args.events)
+    start = time.perf_counter()
+    
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+    
+    with ParseGuard(args.max_file_kb * 1024, args.parse_timeout) as guard:
+        parsed = parse_sources(args.root_dirs, args.io_workers, args.prefetch_mb * 1024 * 1024, guard, args.projects,
+                               load_manifest(args.output))
+    
+    options = {
+        'compact': args.compact,
+        'minify': args.minify,
+        'max_collection_bytes': int(args.max_collection_mb * 1024 * 1024)
+    }
+    run_emitters(parsed, args.output, args.formats, options)
+    
+    write_quarantine_report(parsed['quarantined'], args.output)
     
-    print(f"Created main collection: {os.path.join(args.output, 'All_Services.json')}")
+    services = [service for project in parsed['projects'] for service in project['services']]
+    events.emit(
+        'summary',
+        duration_s=round(time.perf_counter() - start, 3),
+        models=len(parsed['model_map']),
+        projects=len(parsed['projects']),
+        services=len(services),
+        methods=sum(len(service['methods']) for service in services),
+        files_parsed=events.counts.get('file_parsed', 0),
+        collections_written=events.counts.get('collection_written', 0),
+        quarantined=len(parsed['quarantined']),
+        errors=events.counts.get('error', 0)
+    )
+    events.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()